@@ -103,9 +103,9 @@ class AlarmDecoder(object):
     """The configuration bits set on the device."""
     address_mask = 0xFFFFFFFF
     """The address mask configured on the device."""
-    emulate_zone = [False for _ in list(range(5))]
+    emulate_zone = [False] * 5
     """List containing the devices zone emulation status."""
-    emulate_relay = [False for _ in list(range(4))]
+    emulate_relay = [False] * 4
     """List containing the devices relay emulation status."""
     emulate_lrr = False
     """The status of the devices LRR emulation."""
@@ -124,6 +124,21 @@ class AlarmDecoder(object):
     version_flags = ""
     """Device flags enabled"""
 
+    _sending_regex = re.compile(r'^!Sending(\.{1,5})done.*')
+    _mask_regex = re.compile(r'^(?:!KPM:)?\[[^\]]*\],[^,]*,\[..([a-fA-F0-9]{8})')
+
+    # Configuration keys mapped to the attribute they set and its parser.
+    # EXP and REL are handled separately because they update lists.
+    _config_parsers = {
+        'ADDRESS': ('address', int),
+        'CONFIGBITS': ('configbits', lambda val: int(val, 16)),
+        'MASK': ('address_mask', lambda val: int(val, 16)),
+        'LRR': ('emulate_lrr', lambda val: val == 'Y'),
+        'DEDUPLICATE': ('deduplicate', lambda val: val == 'Y'),
+        'MODE': ('mode', lambda val: PANEL_TYPES[val]),
+        'COM': ('emulate_com', lambda val: val == 'Y'),
+    }
+
     def __init__(self, device, ignore_message_states=False, ignore_lrr_states=True):
         """
         Constructor
@@ -167,8 +182,8 @@ class AlarmDecoder(object):
         self.address = 18
         self.configbits = 0xFF00
         self.address_mask = 0xFFFFFFFF
-        self.emulate_zone = [False for x in list(range(5))]
-        self.emulate_relay = [False for x in list(range(4))]
+        self.emulate_zone = [False] * 5
+        self.emulate_relay = [False] * 4
         self.emulate_lrr = False
         self.deduplicate = False
         self.mode = ADEMCO
@@ -178,6 +193,31 @@ class AlarmDecoder(object):
         self.version_number = 'Unknown'
         self.version_flags = ""
 
+        # Message headers that map directly to a handler.
+        self._header_handlers = {
+            '!KPM': self._handle_keypad_message,
+            '!EXP': self._handle_expander_message,
+            '!REL': self._handle_expander_message,
+            '!RFX': self._handle_rfx,
+            '!LRR': self._handle_lrr,
+            '!AUI': self._handle_aui,
+        }
+
+        # Status lines that update the decoder but produce no message.
+        self._status_handlers = (
+            ('!Ready', self._handle_boot),
+            ('!CONFIG', self._handle_config),
+            ('!VER', self._handle_version),
+            ('!Sending', self._handle_sending),
+        )
+
+        # Bound once so the per-line paths skip the event descriptor lookup.
+        self._emit_read = self.on_read.fire
+        self._emit_write = self.on_write.fire
+        self._emit_message = self.on_message.fire
+        self._emit_zone_fault = self.on_zone_fault.fire
+        self._emit_zone_restore = self.on_zone_restore.fire
+
     def __enter__(self):
         """
         Support for context manager __enter__.
@@ -288,6 +328,17 @@ class AlarmDecoder(object):
         self._device.close()
         self._unwire_events()
 
+    def fileno(self):
+        """
+        Returns the file number of the underlying device, so the decoder can
+        be registered with select() or epoll alongside other descriptors when
+        opened with no_reader_thread.
+
+        :returns: int
+        :raises: NotImplementedError if the device does not expose one
+        """
+        return self._device.fileno()
+
     def send(self, data):
         """
         Sends data to the `AlarmDecoder`_ device.
@@ -341,8 +392,6 @@ class AlarmDecoder(object):
         config_entries.append(('MODE', list(PANEL_TYPES)[list(PANEL_TYPES.values()).index(self.mode)]))
         config_entries.append(('COM', 'Y' if self.emulate_com else 'N'))
 
-        config_string = '&'.join(['='.join(t) for t in config_entries])
-
         return '&'.join(['='.join(t) for t in config_entries])
 
     def get_version(self):
@@ -432,37 +481,23 @@ class AlarmDecoder(object):
         if data is None or data == '':
             raise InvalidMessageError()
 
-        msg = None
-        header = data[0:4]
-
-        if header[0] != '!' or header == '!KPM':
-            msg = self._handle_keypad_message(data)
-
-        elif header == '!EXP' or header == '!REL':
-            msg = self._handle_expander_message(data)
-
-        elif header == '!RFX':
-            msg = self._handle_rfx(data)
+        # Keypad messages are the common case; route them on the first
+        # character before slicing out a header.
+        if data[0] != '!':
+            return self._handle_keypad_message(data)
 
-        elif header == '!LRR':
-            msg = self._handle_lrr(data)
+        handler = self._header_handlers.get(data[:4])
+        if handler is not None:
+            return handler(data)
 
-        elif header == '!AUI':
-            msg = self._handle_aui(data)
+        # Anything that is not a known status line (prompts, command echoes)
+        # is ignored.
+        for prefix, handler in self._status_handlers:
+            if data.startswith(prefix):
+                handler(data)
+                break
 
-        elif data.startswith('!Ready'):
-            self.on_boot()
-
-        elif data.startswith('!CONFIG'):
-            self._handle_config(data)
-
-        elif data.startswith('!VER'):
-            self._handle_version(data)
-
-        elif data.startswith('!Sending'):
-            self._handle_sending(data)
-
-        return msg
+        return None
 
     def _handle_keypad_message(self, data):
         """
@@ -471,16 +506,22 @@ class AlarmDecoder(object):
         :param data: keypad message to parse
         :type data: string
 
-        :returns: :py:class:`~alarmdecoder.messages.Message`
+        :returns: :py:class:`~alarmdecoder.messages.Message`, or None if the
+                  message is not addressed to our internal address mask
         """
 
+        # Check the address mask before paying for a full parse.
+        match = self._mask_regex.match(data)
+        if match is not None and self._internal_address_mask & int(match.group(1), 16) == 0:
+            return None
+
         msg = Message(data)
 
         if self._internal_address_mask & msg.mask > 0:
             if not self._ignore_message_states:
                 self._update_internal_states(msg)
 
-            self.on_message(message=msg)
+            self._emit_message(message=msg)
 
         return msg
 
@@ -547,6 +588,15 @@ class AlarmDecoder(object):
 
         return msg
 
+    def _handle_boot(self, data):
+        """
+        Handles the boot notification from the panel.
+
+        :param data: boot message
+        :type data: string
+        """
+        self.on_boot()
+
     def _handle_version(self, data):
         """
         Handles received version data.
@@ -571,29 +621,35 @@ class AlarmDecoder(object):
         """
         _, config_string = data.split('>')
         for setting in config_string.split('&'):
-            key, val = setting.split('=')
-
-            if key == 'ADDRESS':
-                self.address = int(val)
-            elif key == 'CONFIGBITS':
-                self.configbits = int(val, 16)
-            elif key == 'MASK':
-                self.address_mask = int(val, 16)
-            elif key == 'EXP':
-                self.emulate_zone = [val[z] == 'Y' for z in list(range(5))]
+            key, _, val = setting.partition('=')
+
+            if key == 'EXP':
+                self._update_emulation_flags(self.emulate_zone, val)
+
             elif key == 'REL':
-                self.emulate_relay = [val[r] == 'Y' for r in list(range(4))]
-            elif key == 'LRR':
-                self.emulate_lrr = (val == 'Y')
-            elif key == 'DEDUPLICATE':
-                self.deduplicate = (val == 'Y')
-            elif key == 'MODE':
-                self.mode = PANEL_TYPES[val]
-            elif key == 'COM':
-                self.emulate_com = (val == 'Y')
+                self._update_emulation_flags(self.emulate_relay, val)
+
+            else:
+                parser = self._config_parsers.get(key)
+                if parser is not None:
+                    attr, parse = parser
+                    setattr(self, attr, parse(val))
 
         self.on_config_received()
 
+    def _update_emulation_flags(self, flags, val):
+        """
+        Refreshes an emulation flag list in place, so references held by
+        callers stay current.
+
+        :param flags: emulate_zone or emulate_relay
+        :type flags: list
+        :param val: Y/N flags from the configuration string
+        :type val: string
+        """
+        for idx, flag in enumerate(val[:len(flags)]):
+            flags[idx] = (flag == 'Y')
+
     def _handle_sending(self, data):
         """
         Handles results of a keypress send.
@@ -602,7 +658,7 @@ class AlarmDecoder(object):
         :type data: string
         """
 
-        matches = re.match('^!Sending(\.{1,5})done.*', data)
+        matches = self._sending_regex.match(data)
         if matches is not None:
             good_send = False
             if len(matches.group(1)) < 5:
@@ -892,16 +948,38 @@ class AlarmDecoder(object):
         if battery_status is None:
             return
 
-        last_status, last_update = self._battery_status
-        if battery_status == last_status:
-            self._battery_status = (last_status, time.time())
-        else:
-            if battery_status is True or time.time() > last_update + self._battery_timeout:
-                self._battery_status = (battery_status, time.time())
-                self.on_low_battery(status=battery_status)
+        self._battery_status, changed = self._debounce_status(self._battery_status, battery_status, self._battery_timeout)
+        if changed:
+            self.on_low_battery(status=battery_status)
 
         return self._battery_status[0]
 
+    def _debounce_status(self, current, status, timeout):
+        """
+        Debounces a timestamped status flag.  A status becoming True is
+        accepted immediately, while a status clearing is only accepted once
+        the previous status has not been refreshed within the timeout.
+
+        :param current: the current (status, last update) pair
+        :type current: tuple
+        :param status: the newly reported status
+        :type status: bool
+        :param timeout: seconds before the previous status may revert
+        :type timeout: int
+
+        :returns: tuple of the new (status, last update) pair and whether or not the status changed
+        """
+        last_status, last_update = current
+        now = time.time()
+
+        if status == last_status:
+            return (last_status, now), False
+
+        if status is True or now > last_update + timeout:
+            return (status, now), True
+
+        return current, False
+
     def _update_fire_status(self, message=None, status=None):
         """
         Uses the provided message to update the fire alarm state.
@@ -917,6 +995,7 @@ class AlarmDecoder(object):
 
         last_status  = self._fire_status
         last_update = self._fire_status_timeout
+        now = time.time()
 
         # Quirk in Ademco panels. Fire bit goes on/off if other alarms are on or a system fault
         if isinstance(message, Message):
@@ -942,11 +1021,11 @@ class AlarmDecoder(object):
                 # if we had an alarm already and we get it again extend the timeout
                 if message.fire_alarm and message.fire_alarm == self._fire_status:
                     self._fire_status = message.fire_alarm
-                    self._fire_status_timeout = time.time()
+                    self._fire_status_timeout = now
 
                 # if we timeout with an alarm set restore it
                 if self._fire_status:
-                    if time.time() > last_update + self._fire_timeout:
+                    if now > last_update + self._fire_timeout:
                         fire_status = False
 
             else:
@@ -955,7 +1034,7 @@ class AlarmDecoder(object):
         if fire_status != self._fire_status:
             if fire_status is not None:
                 self._fire_status = fire_status
-                self._fire_status_timeout = time.time()
+                self._fire_status_timeout = now
                 self.on_fire(status=fire_status)
 
         return self._fire_status
@@ -1009,8 +1088,9 @@ class AlarmDecoder(object):
         # NOTE: This only happens on first boot or after exiting programming mode.
         if isinstance(message, Message):
             if not message.ready and ("Hit * for faults" in message.text or "Press *  to show faults" in message.text):
-                if time.time() > self.last_fault_expansion + self.fault_expansion_time_limit:
-                    self.last_fault_expansion = time.time()
+                now = time.time()
+                if now > self.last_fault_expansion + self.fault_expansion_time_limit:
+                    self.last_fault_expansion = now
                     self.send('*')
                     return
 
@@ -1036,7 +1116,7 @@ class AlarmDecoder(object):
         Internal handler for reading from the device.
         """
         data = kwargs.get('data', None)
-        self.on_read(data=data)
+        self._emit_read(data=data)
 
         self._handle_message(data)
 
@@ -1044,16 +1124,16 @@ class AlarmDecoder(object):
         """
         Internal handler for writing to the device.
         """
-        self.on_write(data=kwargs.get('data', None))
+        self._emit_write(data=kwargs.get('data', None))
 
     def _on_zone_fault(self, sender, *args, **kwargs):
         """
         Internal handler for zone faults.
         """
-        self.on_zone_fault(*args, **kwargs)
+        self._emit_zone_fault(*args, **kwargs)
 
     def _on_zone_restore(self, sender, *args, **kwargs):
         """
         Internal handler for zone restoration.
         """
-        self.on_zone_restore(*args, **kwargs)
+        self._emit_zone_restore(*args, **kwargs)
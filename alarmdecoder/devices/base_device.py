@@ -41,15 +41,25 @@ class Device(object):
     on_read = event.Event("This event is called when a line has been read from the device.\n\n**Callback definition:** def callback(device, data)*")
     on_write = event.Event("This event is called when data has been written to the device.\n\n**Callback definition:** def callback(device, data)*")
 
+    READ_CHUNK_SIZE = 4096
+    """Maximum number of bytes requested from the device per read in read_line()."""
+    READER_JOIN_TIMEOUT = 1.0
+    """Time (in seconds) to wait for the reader thread to exit when stopping it."""
+    WRITE_BUFFER_SIZE = 64
+    """Number of held back bytes that forces a flush when buffered writes are enabled."""
+
     def __init__(self):
         """
         Constructor
         """
         self._id = ''
-        self._buffer = b''
+        self._buffer = bytearray()
+        self._scan_offset = 0
         self._device = None
         self._running = False
         self._read_thread = None
+        self._buffered_writes = False
+        self._write_buffer = bytearray()
 
     def __enter__(self):
         """
@@ -84,27 +94,74 @@ class Device(object):
         """
         self._id = value
 
+    @property
+    def buffered_writes(self):
+        """
+        Retrieves whether or not writes are held back until a line terminator
+        is written, WRITE_BUFFER_SIZE bytes have built up or flush() is called.
+
+        :returns: whether or not buffered writes are enabled
+        """
+        return self._buffered_writes
+
+    @buffered_writes.setter
+    def buffered_writes(self, value):
+        """
+        Enables or disables buffered writes.  Disabling them writes out
+        anything that was held back.
+
+        :param value: whether or not to buffer writes
+        :type value: bool
+        """
+        if not value:
+            self.flush()
+
+        self._buffered_writes = value
+
+    def flush(self):
+        """
+        Writes out any data held back by buffered writes.  If the write fails
+        the data is kept for another flush(), until the device is closed.
+
+        :raises: :py:class:`~alarmdecoder.util.CommError`
+        """
+        if len(self._write_buffer) > 0:
+            self._flush_write_buffer()
+
     def is_reader_alive(self):
         """
         Indicates whether or not the reader thread is alive.
 
         :returns: whether or not the reader thread is alive
         """
-        return self._read_thread.is_alive()
+        return self._read_thread is not None and self._read_thread.is_alive()
 
-    def stop_reader(self):
+    def stop_reader(self, timeout=None):
         """
         Stops the reader thread.
+
+        :param timeout: maximum number of seconds to wait for the reader to
+                        exit, defaults to READER_JOIN_TIMEOUT
+        :type timeout: float
         """
-        self._read_thread.stop()
+        if self._read_thread is not None:
+            self._read_thread.stop()
+            self._join_reader(timeout)
 
     def close(self):
         """
-        Closes the device.
+        Closes the device.  Any data still held back by buffered writes is
+        discarded rather than sent ahead of the next command.
         """
+        # A partial keypad sequence from this connection must not be
+        # prefixed to whatever is written after a re-open.
+        del self._write_buffer[:]
+
         try:
             self._running = False
-            self._read_thread.stop()
+            if self._read_thread is not None:
+                self._read_thread.stop()
+
             self._device.close()
 
         except Exception:
@@ -112,6 +169,116 @@ class Device(object):
 
         self.on_close()
 
+    def _reader_stopped(self):
+        """
+        Indicates whether read_line() is running on a reader thread that has
+        been stopped, so it can return instead of waiting out its timeout.
+
+        :returns: whether or not the calling reader thread has been stopped
+        """
+        thread = threading.current_thread()
+        return isinstance(thread, Device.ReadThread) and not thread._running
+
+    def _join_reader(self, timeout=None):
+        """
+        Waits for the reader thread to exit, unless it is the caller.
+
+        :param timeout: maximum number of seconds to wait, defaults to
+                        READER_JOIN_TIMEOUT
+        :type timeout: float
+        """
+        if timeout is None:
+            timeout = self.READER_JOIN_TIMEOUT
+
+        thread = self._read_thread
+        if thread is not None and thread is not threading.current_thread() and thread.is_alive():
+            thread.join(timeout)
+
+    def _write_raw(self, data):
+        """
+        Writes data straight to the transport, bypassing the write buffer and
+        the on_write event.
+
+        :param data: data to write
+        :type data: bytes
+
+        :returns: number of bytes written, or None if the whole buffer was
+                  written
+        :raises: :py:class:`~alarmdecoder.util.CommError`
+        """
+        raise NotImplementedError()
+
+    def _buffer_write(self, data):
+        """
+        Adds data to the write buffer and writes the buffer out once a line
+        terminator is seen or it reaches WRITE_BUFFER_SIZE bytes.
+
+        :param data: data being written
+        :type data: bytes
+
+        :returns: number of bytes written to the transport
+        :raises: :py:class:`~alarmdecoder.util.CommError`
+        """
+        buf = self._write_buffer
+        buf.extend(data)
+
+        if b'\r' in data or b'\n' in data or len(buf) >= self.WRITE_BUFFER_SIZE:
+            return self._flush_write_buffer()
+
+        return 0
+
+    def _flush_write_buffer(self):
+        """
+        Writes out the write buffer.  Data is only dropped from the buffer
+        once the transport has accepted it, so a failed write can be retried
+        with flush().
+
+        :returns: number of bytes written to the transport
+        :raises: :py:class:`~alarmdecoder.util.CommError`
+        """
+        buf = self._write_buffer
+        data = bytes(buf)
+
+        sent = self._write_raw(data)
+        if sent is None:
+            sent = len(data)
+
+        del buf[:sent]
+
+        self.on_write(data=data[:sent])
+
+        return sent
+
+    def _purge_read_buffer(self):
+        """
+        Discards any partially-read data.
+        """
+        del self._buffer[:]
+        self._scan_offset = 0
+
+    def _extract_line(self):
+        """
+        Removes the first complete line from the read buffer.  Only bytes that
+        have not been searched before are scanned for the terminator.
+
+        :returns: the line without its terminator, or None if no non-empty line
+                  has been buffered yet
+        """
+        buf = self._buffer
+
+        while True:
+            idx = buf.find(b"\n", self._scan_offset)
+            if idx == -1:
+                self._scan_offset = len(buf)
+                return None
+
+            line = bytes(buf[:idx].rstrip(b"\r\n"))
+            del buf[:idx + 1]
+            self._scan_offset = 0
+
+            if line:
+                return line
+
     class ReadThread(threading.Thread):
         """
         Reader thread which processes messages from the device.
@@ -128,8 +295,11 @@ class Device(object):
             :type device: :py:class:`~alarmdecoder.devices.Device`
             """
             threading.Thread.__init__(self)
+            self.daemon = True
             self._device = device
-            self._running = False
+            # Set here rather than in run() so a stop() issued before the
+            # thread is scheduled is not overwritten.
+            self._running = True
 
         def stop(self):
             """
@@ -141,8 +311,6 @@ class Device(object):
             """
             The actual read process.
             """
-            self._running = True
-
             while self._running:
                 try:
                     self._device.read_line(timeout=self.READ_TIMEOUT)
@@ -157,9 +325,13 @@ class Device(object):
                     pass
 
                 except CommError as err:
-                    self._device.close()
+                    # A stopped reader must not close a device that has
+                    # since been re-opened.
+                    if self._running:
+                        self._device.close()
 
                 except Exception as err:
-                    self._device.close()
+                    if self._running:
+                        self._device.close()
                     self._running = False
                     raise
\ No newline at end of file
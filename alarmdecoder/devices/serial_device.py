@@ -8,13 +8,13 @@ This module contains the :py:class:`SerialDevice` interface for the `AD2USB`_, `
 .. moduleauthor:: Scott Petersen <scott@nutech.com>
 """
 
-import threading
 import serial
 import serial.tools.list_ports
+import re
 import select
 import sys
 from .base_device import Device
-from ..util import CommError, TimeoutError, NoDeviceError, bytes_hack, filter_ad2prot_byte
+from ..util import CommError, TimeoutError, NoDeviceError, bytes_hack, filter_ad2prot_byte, filter_ad2prot_bytes, monotonic
 
 
 class SerialDevice(Device):
@@ -25,28 +25,50 @@ class SerialDevice(Device):
     # Constants
     BAUDRATE = 19200
     """Default baudrate for Serial devices."""
+    PORT_CACHE_TTL = 1.0
+    """Time (in seconds) that the serial port list is reused by find_all()."""
 
-    @staticmethod
-    def find_all(pattern=None):
+    __ports = None
+    __ports_updated = None
+
+    @classmethod
+    def find_all(cls, pattern=None, nocache=False):
         """
         Returns all serial ports present.
 
         :param pattern: pattern to search for when retrieving serial ports
         :type pattern: string
+        :param nocache: whether or not to re-enumerate the serial ports even
+                        if they were listed within PORT_CACHE_TTL seconds
+        :type nocache: bool
 
         :returns: list of devices
         :raises: :py:class:`~alarmdecoder.util.CommError`
         """
-        devices = []
+        now = monotonic()
+        ports, updated = cls.__ports, cls.__ports_updated
 
-        try:
-            if pattern:
-                devices = serial.tools.list_ports.grep(pattern)
-            else:
-                devices = serial.tools.list_ports.comports()
+        if nocache or ports is None or now - updated >= cls.PORT_CACHE_TTL:
+            try:
+                ports = list(serial.tools.list_ports.comports())
 
-        except serial.SerialException as err:
-            raise CommError('Error enumerating serial devices: {0}'.format(str(err)), err)
+            except serial.SerialException as err:
+                raise CommError('Error enumerating serial devices: {0}'.format(str(err)), err)
+
+            cls.__ports, cls.__ports_updated = ports, now
+
+        if not pattern:
+            return list(ports)
+
+        # Same matching as serial.tools.list_ports.grep(), but against the
+        # cached port list.
+        regex = re.compile(pattern, re.I)
+
+        devices = []
+        for info in ports:
+            port, desc, hwid = info
+            if regex.search(port) or regex.search(desc) or regex.search(hwid):
+                devices.append(info)
 
         return devices
 
@@ -95,6 +117,10 @@ class SerialDevice(Device):
 
         :raises: :py:class:`~alarmdecoder.util.NoDeviceError`
         """
+        # A reader left over from a previous open() must exit before the
+        # transport is replaced.
+        self._join_reader()
+
         # Set up the defaults
         if baudrate is None:
             baudrate = SerialDevice.BAUDRATE
@@ -102,8 +128,6 @@ class SerialDevice(Device):
         if self._port is None:
             raise NoDeviceError('No device interface specified.')
 
-        self._read_thread = Device.ReadThread(self)
-
         # Open the device and start up the reader thread.
         try:
             self._device.port = self._port
@@ -124,6 +148,7 @@ class SerialDevice(Device):
             self.on_open()
 
             if not no_reader_thread:
+                self._read_thread = Device.ReadThread(self)
                 self._read_thread.start()
 
         return self
@@ -160,17 +185,34 @@ class SerialDevice(Device):
             if isinstance(data, str) or (sys.version_info < (3,) and isinstance(data, unicode)):
                 data = data.encode('utf-8')
 
-            self._device.write(data)
+            if self._buffered_writes:
+                self._buffer_write(data)
+
+            else:
+                self._write_raw(data)
+                self.on_write(data=data)
 
         except serial.SerialTimeoutException:
             pass
 
+    def _write_raw(self, data):
+        """
+        Writes data straight to the serial port.
+
+        :param data: data to write
+        :type data: bytes
+
+        :raises: :py:class:`~alarmdecoder.util.CommError`
+        """
+        try:
+            self._device.write(data)
+
+        except serial.SerialTimeoutException:
+            raise
+
         except serial.SerialException as err:
             raise CommError('Error writing to device.', err)
 
-        else:
-            self.on_write(data=data)
-
     def read(self):
         """
         Reads a single character from the device.
@@ -205,53 +247,38 @@ class SerialDevice(Device):
         :raises: :py:class:`~alarmdecoder.util.CommError`, :py:class:`~alarmdecoder.util.TimeoutError`
         """
 
-        def timeout_event():
-            """Handles read timeout event"""
-            timeout_event.reading = False
-        timeout_event.reading = True
-
         if purge_buffer:
-            self._buffer = b''
-
-        got_line, ret = False, None
+            self._purge_read_buffer()
 
-        timer = threading.Timer(timeout, timeout_event)
-        if timeout > 0:
-            timer.start()
+        deadline = monotonic() + timeout if timeout > 0 else None
 
         try:
-            while timeout_event.reading:
+            # A previous chunk may have already delivered the next line.
+            ret = self._extract_line()
+
+            while ret is None and not self._reader_stopped() and (deadline is None or monotonic() < deadline):
                 read_ready, _, _ = select.select([self._device.fileno()], [], [], 0.5)
 
                 if len(read_ready) == 0:
                     continue
 
-                buf = filter_ad2prot_byte(self._device.read(1))
+                # The port is non-blocking, so this returns whatever is waiting.
+                buf = filter_ad2prot_bytes(self._device.read(self.READ_CHUNK_SIZE))
 
                 if buf != b'':
-                    self._buffer += buf
-
-                    if buf == b"\n":
-                        self._buffer = self._buffer.rstrip(b"\r\n")
+                    self._buffer.extend(buf)
 
-                        if len(self._buffer) > 0:
-                            got_line = True
-                            break
+                    ret = self._extract_line()
         except (OSError, serial.SerialException) as err:
             raise CommError('Error reading from device: {0}'.format(str(err)), err)
 
         else:
-            if got_line:
-                ret, self._buffer = self._buffer, b''
-
+            if ret is not None:
                 self.on_read(data=ret)
 
             else:
                 raise TimeoutError('Timeout while waiting for line terminator.')
 
-        finally:
-            timer.cancel()
-
         return ret.decode('utf-8')
 
     def purge(self):
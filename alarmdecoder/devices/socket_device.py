@@ -9,29 +9,13 @@ SSL if using `ser2sock`_.
 .. moduleauthor:: Scott Petersen <scott@nutech.com>
 """
 
-import threading
 import socket
 import select
-from .base_device import Device
-from ..util import CommError, TimeoutError, NoDeviceError, bytes_hack
+from .base_device import Device, SSL, have_openssl
+from ..util import CommError, TimeoutError, NoDeviceError, bytes_hack, monotonic
 
-try:
-    from OpenSSL import SSL, crypto
-
-    have_openssl = True
-
-except ImportError:
-    class SSL:
-        class Error(BaseException):
-            pass
-
-        class WantReadError(BaseException):
-            pass
-
-        class SysCallError(BaseException):
-            pass
-
-    have_openssl = False
+if have_openssl:
+    from OpenSSL import crypto
 
 
 class SocketDevice(Device):
@@ -40,6 +24,13 @@ class SocketDevice(Device):
     exposed via `ser2sock`_ or another Serial to IP interface.
     """
 
+    KEEPALIVE_IDLE = 30
+    """Seconds a connection may sit idle before keepalive probes are sent."""
+    KEEPALIVE_INTERVAL = 10
+    """Seconds between keepalive probes."""
+    KEEPALIVE_COUNT = 3
+    """Number of unanswered keepalive probes before the connection is dropped."""
+
     @property
     def interface(self):
         """
@@ -96,6 +87,7 @@ class SocketDevice(Device):
         :type value: string or :py:class:`OpenSSL.crypto.X509`
         """
         self._ssl_certificate = value
+        self._ssl_context = None
 
     @property
     def ssl_key(self):
@@ -115,6 +107,7 @@ class SocketDevice(Device):
         :type value: string or :py:class:`OpenSSL.crypto.PKey`
         """
         self._ssl_key = value
+        self._ssl_context = None
 
     @property
     def ssl_ca(self):
@@ -135,6 +128,7 @@ class SocketDevice(Device):
         :type value: string or :py:class:`OpenSSL.crypto.X509`
         """
         self._ssl_ca = value
+        self._ssl_context = None
 
     @property
     def ssl_allow_self_signed(self):
@@ -154,6 +148,7 @@ class SocketDevice(Device):
         :type value: bool
         """
         self._ssl_allow_self_signed = value
+        self._ssl_context = None
 
     def __init__(self, interface=("localhost", 10000)):
         """
@@ -170,6 +165,7 @@ class SocketDevice(Device):
         self._ssl_key = None
         self._ssl_ca = None
         self._ssl_allow_self_signed = False
+        self._ssl_context = None
 
     def open(self, baudrate=None, no_reader_thread=False):
         """
@@ -183,11 +179,13 @@ class SocketDevice(Device):
 
         :raises: :py:class:`~alarmdecoder.util.NoDeviceError`, :py:class:`~alarmdecoder.util.CommError`
         """
+        # A reader left over from a previous open() must exit before the
+        # transport is replaced.
+        self._join_reader()
 
         try:
-            self._read_thread = Device.ReadThread(self)
-
             self._device = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            self._set_socket_options()
 
             if self._use_ssl:
                 self._init_ssl()
@@ -212,6 +210,7 @@ class SocketDevice(Device):
             self.on_open()
 
             if not no_reader_thread:
+                self._read_thread = Device.ReadThread(self)
                 self._read_thread.start()
 
         return self
@@ -252,22 +251,37 @@ class SocketDevice(Device):
         :returns: number of bytes sent
         :raises: :py:class:`~alarmdecoder.util.CommError`
         """
-        data_sent = None
+        if isinstance(data, str):
+            data = data.encode('utf-8')
 
-        try:
-            if isinstance(data, str):
-                data = data.encode('utf-8')
+        if self._buffered_writes:
+            return self._buffer_write(data)
 
-            data_sent = self._device.send(data)
+        data_sent = self._write_raw(data)
+
+        self.on_write(data=data)
 
-            if data_sent == 0:
-                raise CommError('Error writing to device.')
+        return data_sent
+
+    def _write_raw(self, data):
+        """
+        Writes data straight to the socket.
 
-            self.on_write(data=data)
+        :param data: data to write
+        :type data: bytes
+
+        :returns: number of bytes sent
+        :raises: :py:class:`~alarmdecoder.util.CommError`
+        """
+        try:
+            data_sent = self._device.send(data)
 
         except (SSL.Error, socket.error) as err:
             raise CommError('Error writing to device.', err)
 
+        if data_sent == 0:
+            raise CommError('Error writing to device.')
+
         return data_sent
 
     def read(self):
@@ -277,7 +291,7 @@ class SocketDevice(Device):
         :returns: character read from the device
         :raises: :py:class:`~alarmdecoder.util.CommError`
         """
-        data = ''
+        data = b''
 
         try:
             read_ready, _, _ = select.select([self._device], [], [], 0.5)
@@ -304,63 +318,52 @@ class SocketDevice(Device):
         :raises: :py:class:`~alarmdecoder.util.CommError`, :py:class:`~alarmdecoder.util.TimeoutError`
         """
 
-        def timeout_event():
-            """Handles read timeout event"""
-            timeout_event.reading = False
-        timeout_event.reading = True
-
         if purge_buffer:
-            self._buffer = b''
-
-        got_line, ret = False, None
+            self._purge_read_buffer()
 
-        timer = threading.Timer(timeout, timeout_event)
-        if timeout > 0:
-            timer.start()
+        deadline = monotonic() + timeout if timeout > 0 else None
 
         try:
-            while timeout_event.reading:
-                read_ready, _, _ = select.select([self._device], [], [], 0.5)
+            # A previous chunk may have already delivered the next line.
+            ret = self._extract_line()
 
-                if len(read_ready) == 0:
-                    continue
+            while ret is None and not self._reader_stopped() and (deadline is None or monotonic() < deadline):
+                # Bytes already decrypted by the SSL connection never show up
+                # in select(), so only wait on the socket when there are none.
+                if not (self._use_ssl and self._device.pending()):
+                    wait = 0.5
+                    if deadline is not None:
+                        wait = max(0, min(wait, deadline - monotonic()))
 
-                buf = self._device.recv(1)
+                    read_ready, _, _ = select.select([self._device], [], [], wait)
 
-                if buf != b'' and buf != b"\xff":
-                    ub = bytes_hack(buf)
+                    if len(read_ready) == 0:
+                        continue
 
-                    self._buffer += ub
+                buf = self._device.recv(self.READ_CHUNK_SIZE)
 
-                    if ub == b"\n":
-                        self._buffer = self._buffer.rstrip(b"\r\n")
+                if buf != b'':
+                    self._buffer.extend(bytes_hack(buf).replace(b"\xff", b""))
 
-                        if len(self._buffer) > 0:
-                            got_line = True
-                            break
+                    ret = self._extract_line()
 
         except socket.error as err:
             raise CommError('Error reading from device: {0}'.format(str(err)), err)
 
         except SSL.SysCallError as err:
-            errno, msg = err
+            errno, msg = err.args
             raise CommError('SSL error while reading from device: {0} ({1})'.format(msg, errno))
 
         except Exception:
             raise
 
         else:
-            if got_line:
-                ret, self._buffer = self._buffer, b''
-
+            if ret is not None:
                 self.on_read(data=ret)
 
             else:
                 raise TimeoutError('Timeout while waiting for line terminator.')
 
-        finally:
-            timer.cancel()
-
         return ret.decode('utf-8')
 
     def purge(self):
@@ -376,6 +379,29 @@ class SocketDevice(Device):
         finally:
             self._device.setblocking(1)
 
+    def _set_socket_options(self):
+        """
+        Disables Nagle's algorithm so short keypad commands go out immediately
+        and enables TCP keepalive so a dead `ser2sock`_ peer is noticed.
+        """
+        options = [
+            (socket.IPPROTO_TCP, socket.TCP_NODELAY, 1),
+            (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1),
+        ]
+
+        # Keepalive timing is only tunable on some platforms.
+        for name, value in (('TCP_KEEPIDLE', self.KEEPALIVE_IDLE),
+                            ('TCP_KEEPINTVL', self.KEEPALIVE_INTERVAL),
+                            ('TCP_KEEPCNT', self.KEEPALIVE_COUNT)):
+            if hasattr(socket, name):
+                options.append((socket.IPPROTO_TCP, getattr(socket, name), value))
+
+        for level, option, value in options:
+            try:
+                self._device.setsockopt(level, option, value)
+            except socket.error:
+                pass
+
     def _init_ssl(self):
         """
         Initializes our device as an SSL connection.
@@ -387,34 +413,49 @@ class SocketDevice(Device):
             raise ImportError('SSL sockets have been disabled due to missing requirement: pyopenssl.')
 
         try:
-            ctx = SSL.Context(SSL.TLSv1_METHOD)
+            # The context only depends on the SSL settings, so build it once
+            # and reuse it when reconnecting.
+            ctx = self._ssl_context
+            if ctx is None:
+                ctx = self._ssl_context = self._create_ssl_context()
 
-            if isinstance(self.ssl_key, crypto.PKey):
-                ctx.use_privatekey(self.ssl_key)
-            else:
-                ctx.use_privatekey_file(self.ssl_key)
+            self._device = SSL.Connection(ctx, self._device)
 
-            if isinstance(self.ssl_certificate, crypto.X509):
-                ctx.use_certificate(self.ssl_certificate)
-            else:
-                ctx.use_certificate_file(self.ssl_certificate)
+        except SSL.Error as err:
+            raise CommError('Error setting up SSL connection.', err)
 
-            if isinstance(self.ssl_ca, crypto.X509):
-                store = ctx.get_cert_store()
-                store.add_cert(self.ssl_ca)
-            else:
-                ctx.load_verify_locations(self.ssl_ca, None)
+    def _create_ssl_context(self):
+        """
+        Builds the SSL context from the configured key and certificates.
 
-            verify_method = SSL.VERIFY_PEER
-            if (self._ssl_allow_self_signed):
-                verify_method = SSL.VERIFY_NONE
+        :returns: :py:class:`OpenSSL.SSL.Context`
+        :raises: :py:class:`OpenSSL.SSL.Error`
+        """
+        ctx = SSL.Context(SSL.TLSv1_METHOD)
 
-            ctx.set_verify(verify_method, self._verify_ssl_callback)
+        if isinstance(self.ssl_key, crypto.PKey):
+            ctx.use_privatekey(self.ssl_key)
+        else:
+            ctx.use_privatekey_file(self.ssl_key)
 
-            self._device = SSL.Connection(ctx, self._device)
+        if isinstance(self.ssl_certificate, crypto.X509):
+            ctx.use_certificate(self.ssl_certificate)
+        else:
+            ctx.use_certificate_file(self.ssl_certificate)
 
-        except SSL.Error as err:
-            raise CommError('Error setting up SSL connection.', err)
+        if isinstance(self.ssl_ca, crypto.X509):
+            store = ctx.get_cert_store()
+            store.add_cert(self.ssl_ca)
+        else:
+            ctx.load_verify_locations(self.ssl_ca, None)
+
+        verify_method = SSL.VERIFY_PEER
+        if (self._ssl_allow_self_signed):
+            verify_method = SSL.VERIFY_NONE
+
+        ctx.set_verify(verify_method, self._verify_ssl_callback)
+
+        return ctx
 
     def _verify_ssl_callback(self, connection, x509, errnum, errdepth, ok):
         """
@@ -6,10 +6,14 @@ This module contains the :py:class:`USBDevice` interface for the `AD2USB`_.
 .. moduleauthor:: Scott Petersen <scott@nutech.com>
 """
 
+import os
 import time
+import errno
+import select
+import socket
 import threading
 from .base_device import Device
-from ..util import CommError, TimeoutError, NoDeviceError, bytes_hack
+from ..util import CommError, TimeoutError, NoDeviceError, bytes_hack, monotonic
 from ..event import event
 
 have_pyftdi = False
@@ -54,15 +58,27 @@ class USBDevice(Device):
 
     BAUDRATE = 115200
     """Default baudrate for `AD2USB`_ devices."""
+    LATENCY_TIMER = 1
+    """FTDI latency timer (in milliseconds) used to flush partially-filled packets."""
+
+    ENUMERATION_CACHE_TTL = 1.0
+    """Time (in seconds) that pyftdi's cached USB enumeration is reused by find_all()."""
 
     __devices = []
     __detect_thread = None
+    __last_enumeration = None
 
     @classmethod
-    def find_all(cls, vid=None, pid=None):
+    def find_all(cls, vid=None, pid=None, nocache=None):
         """
         Returns all FTDI devices matching our vendor and product IDs.
 
+        :param nocache: whether or not to bypass pyftdi's cached USB
+                        enumeration.  By default the cache is only used if
+                        the bus was enumerated within ENUMERATION_CACHE_TTL
+                        seconds.
+        :type nocache: bool
+
         :returns: list of devices
         :raises: :py:class:`~alarmdecoder.util.CommError`
         """
@@ -75,8 +91,16 @@ class USBDevice(Device):
         if vid and pid:
             query = [(vid, pid)]
 
+        now = monotonic()
+        if nocache is None:
+            last = cls.__last_enumeration
+            nocache = last is None or now - last >= cls.ENUMERATION_CACHE_TTL
+
         try:
-            cls.__devices = Ftdi.find_all(query, nocache=True)
+            cls.__devices = Ftdi.find_all(query, nocache=nocache)
+
+            if nocache:
+                cls.__last_enumeration = now
 
         except (usb.core.USBError, FtdiError) as err:
             raise CommError('Error enumerating AD2USB devices: {0}'.format(str(err)), err)
@@ -263,12 +287,14 @@ class USBDevice(Device):
 
         :raises: :py:class:`~alarmdecoder.util.NoDeviceError`
         """
+        # A reader left over from a previous open() must exit before the
+        # transport is replaced.
+        self._join_reader()
+
         # Set up defaults
         if baudrate is None:
             baudrate = USBDevice.BAUDRATE
 
-        self._read_thread = Device.ReadThread(self)
-
         # Open the device and start up the thread.
         try:
             self._device.open(self._vendor_id,
@@ -280,6 +306,10 @@ class USBDevice(Device):
 
             self._device.set_baudrate(baudrate)
 
+            # Panel messages rarely fill a USB packet, so don't let the chip
+            # hold them for its default 16ms before sending.
+            self._device.set_latency_timer(self.LATENCY_TIMER)
+
             if not self._serial_number:
                 self._serial_number = self._get_serial_number()
 
@@ -296,6 +326,7 @@ class USBDevice(Device):
             self.on_open()
 
             if not no_reader_thread:
+                self._read_thread = Device.ReadThread(self)
                 self._read_thread.start()
 
         return self
@@ -308,7 +339,9 @@ class USBDevice(Device):
             Device.close(self)
 
             # HACK: Probably should fork pyftdi and make this call in .close()
-            self._device.usb_dev.attach_kernel_driver(self._device_number)
+            usb_dev = self._device.usb_dev
+            if not usb_dev.is_kernel_driver_active(self._device_number):
+                usb_dev.attach_kernel_driver(self._device_number)
 
         except Exception:
             pass
@@ -330,11 +363,29 @@ class USBDevice(Device):
 
         :raises: :py:class:`~alarmdecoder.util.CommError`
         """
-        try:
-            self._device.write_data(data)
+        # Hand pyftdi a bytes object so it doesn't have to convert text.
+        if isinstance(data, str):
+            data = data.encode('utf-8')
 
+        if self._buffered_writes:
+            self._buffer_write(data)
+
+        else:
+            self._write_raw(data)
             self.on_write(data=data)
 
+    def _write_raw(self, data):
+        """
+        Writes data straight to the FTDI device.
+
+        :param data: data to write
+        :type data: bytes
+
+        :raises: :py:class:`~alarmdecoder.util.CommError`
+        """
+        try:
+            self._device.write_data(data)
+
         except FtdiError as err:
             raise CommError('Error writing to device: {0}'.format(str(err)), err)
 
@@ -369,35 +420,22 @@ class USBDevice(Device):
         :raises: :py:class:`~alarmdecoder.util.CommError`, :py:class:`~alarmdecoder.util.TimeoutError`
         """
 
-        def timeout_event():
-            """Handles read timeout event"""
-            timeout_event.reading = False
-        timeout_event.reading = True
-
         if purge_buffer:
-            self._buffer = b''
+            self._purge_read_buffer()
 
-        got_line, ret = False, None
-
-        timer = threading.Timer(timeout, timeout_event)
-        if timeout > 0:
-            timer.start()
+        deadline = monotonic() + timeout if timeout > 0 else None
 
         try:
-            while timeout_event.reading:
-                buf = self._device.read_data(1)
-
-                if buf != b'':
-                    ub = bytes_hack(buf)
+            # A previous chunk may have already delivered the next line.
+            ret = self._extract_line()
 
-                    self._buffer += ub
+            while ret is None and not self._reader_stopped() and (deadline is None or monotonic() < deadline):
+                buf = self._device.read_data(self.READ_CHUNK_SIZE)
 
-                    if ub == b"\n":
-                        self._buffer = self._buffer.rstrip(b"\r\n")
+                if buf != b'':
+                    self._buffer.extend(bytes_hack(buf))
 
-                        if len(self._buffer) > 0:
-                            got_line = True
-                            break
+                    ret = self._extract_line()
                 else:
                     time.sleep(0.01)
 
@@ -405,17 +443,12 @@ class USBDevice(Device):
             raise CommError('Error reading from device: {0}'.format(str(err)), err)
 
         else:
-            if got_line:
-                ret, self._buffer = self._buffer, b''
-
+            if ret is not None:
                 self.on_read(data=ret)
 
             else:
                 raise TimeoutError('Timeout while waiting for line terminator.')
 
-        finally:
-            timer.cancel()
-
         return ret
 
     def purge(self):
@@ -439,6 +472,19 @@ class USBDevice(Device):
         on_attached = event.Event("This event is called when an `AD2USB`_ device has been detected.\n\n**Callback definition:** def callback(thread, device*")
         on_detached = event.Event("This event is called when an `AD2USB`_ device has been removed.\n\n**Callback definition:** def callback(thread, device*")
 
+        POLL_INTERVAL = 0.25
+        """Interval (in seconds) between device scans."""
+        RESCAN_INTERVAL = 4
+        """Number of scans between full, uncached USB enumerations."""
+        UEVENT_RESCAN_INTERVAL = 30
+        """Interval (in seconds) between safety scans when hotplug events are available."""
+        UEVENT_SETTLE_TIME = 0.05
+        """Time (in seconds) to wait after the last hotplug event before scanning."""
+        NETLINK_KOBJECT_UEVENT = 15
+        """Netlink protocol used by the kernel to announce hotplug events."""
+        UEVENT_BUFFER_SIZE = 1024 * 1024
+        """Receive buffer size for the hotplug event socket."""
+
         def __init__(self, on_attached=None, on_detached=None):
             """
             Constructor
@@ -456,35 +502,216 @@ class USBDevice(Device):
             if on_detached:
                 self.on_detached += on_detached
 
-            self._running = False
+            # Set here rather than in run() so a stop() issued before the
+            # thread is scheduled is not overwritten.
+            self._running = True
+            self._stop_event = threading.Event()
+            self._wake_pipe = None
+            self._wake_lock = threading.Lock()
+            self._last_found = None
+            self._devices = {}
+            self._device_ids = frozenset()
 
         def stop(self):
             """
             Stops the thread.
             """
             self._running = False
+            self._stop_event.set()
+
+            # Held so run() cannot close the pipe between the check and the
+            # write, which could otherwise land on a reused descriptor.
+            with self._wake_lock:
+                if self._wake_pipe is not None:
+                    try:
+                        os.write(self._wake_pipe[1], b'\0')
+                    except OSError:
+                        pass
 
         def run(self):
             """
             The actual detection process.
             """
-            self._running = True
+            uevent_sock = self._open_uevent_socket()
+            if uevent_sock is None:
+                self._poll_devices()
+                return
 
-            last_devices = set()
+            with self._wake_lock:
+                self._wake_pipe = os.pipe()
+
+            hotplug_ok = True
+            try:
+                # A stop() that ran before the pipe existed had nothing to
+                # write to, so check for it here.
+                if not self._stop_event.is_set():
+                    hotplug_ok = self._wait_for_uevents(uevent_sock)
+
+            finally:
+                uevent_sock.close()
+
+                with self._wake_lock:
+                    for fd in self._wake_pipe:
+                        os.close(fd)
+                    self._wake_pipe = None
+
+            if not hotplug_ok:
+                self._poll_devices()
+
+        def _open_uevent_socket(self):
+            """
+            Opens a netlink socket subscribed to kernel hotplug events.
+
+            :returns: the bound socket, or None if hotplug events are not
+                      available on this platform
+            """
+            try:
+                sock = socket.socket(socket.AF_NETLINK, socket.SOCK_DGRAM, self.NETLINK_KOBJECT_UEVENT)
+
+            except (AttributeError, socket.error):
+                return None
+
+            try:
+                sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, self.UEVENT_BUFFER_SIZE)
+                sock.bind((0, 1))
+
+            except socket.error:
+                sock.close()
+                return None
+
+            return sock
+
+        def _is_device_uevent(self, data):
+            """
+            Determines whether a hotplug event describes an `AD2USB`_ being
+            added or removed.
+
+            :param data: raw uevent payload
+            :type data: bytes
+
+            :returns: whether or not the device list should be rescanned
+            """
+            fields = {}
+            for field in data.split(b'\0'):
+                key, _, val = field.partition(b'=')
+                fields[key] = val
+
+            if fields.get(b'ACTION') not in (b'add', b'remove'):
+                return False
+
+            if fields.get(b'SUBSYSTEM') != b'usb' or fields.get(b'DEVTYPE') != b'usb_device':
+                return False
+
+            try:
+                vendor, product = fields[b'PRODUCT'].split(b'/')[:2]
+                return (int(vendor, 16), int(product, 16)) in USBDevice.PRODUCT_IDS
+
+            except (KeyError, ValueError):
+                return True
+
+        def _wait_for_uevents(self, uevent_sock):
+            """
+            Rescans the device list only after the kernel reports a matching
+            hotplug event, with an occasional safety scan in case an event
+            was dropped.
+
+            :param uevent_sock: netlink socket returned by _open_uevent_socket()
+            :type uevent_sock: socket.socket
+
+            :returns: False if hotplug events stopped working and the caller
+                      should fall back to polling, otherwise True
+            """
+            wake_fd = self._wake_pipe[0]
+
+            # A single plug produces a burst of uevents, so a scan only runs
+            # once the bus has been quiet for UEVENT_SETTLE_TIME.  The safety
+            # scan is due at a fixed time after the last scan, no matter how
+            # many unrelated events arrive in between.
+            settle_at = None
+            rescan_at = monotonic()
+
+            while self._running and not self._stop_event.is_set():
+                now = monotonic()
+                if now >= rescan_at or (settle_at is not None and now >= settle_at):
+                    self._scan_devices(True)
+
+                    settle_at = None
+                    rescan_at = monotonic() + self.UEVENT_RESCAN_INTERVAL
+                    continue
+
+                timeout = rescan_at - now
+                if settle_at is not None:
+                    timeout = min(timeout, settle_at - now)
+
+                try:
+                    read_ready, _, _ = select.select([uevent_sock, wake_fd], [], [], timeout)
+
+                except (OSError, select.error) as err:
+                    if err.args and err.args[0] == errno.EINTR:
+                        continue
+
+                    return False
+
+                if wake_fd in read_ready:
+                    break
+
+                if not read_ready:
+                    continue
 
-            while self._running:
                 try:
-                    current_devices = set(USBDevice.find_all())
+                    if self._is_device_uevent(uevent_sock.recv(8192)):
+                        settle_at = monotonic() + self.UEVENT_SETTLE_TIME
+
+                except socket.error:
+                    # Events were dropped; rescan to resynchronize.
+                    settle_at = monotonic() + self.UEVENT_SETTLE_TIME
+
+            return True
+
+        def _poll_devices(self):
+            """
+            Rescans the device list every POLL_INTERVAL seconds.
+            """
+            scans = 0
+
+            while self._running:
+                nocache = (scans % self.RESCAN_INTERVAL == 0)
+                self._scan_devices(nocache)
+                scans += 1
+
+                if self._stop_event.wait(self.POLL_INTERVAL):
+                    break
+
+        def _scan_devices(self, nocache):
+            """
+            Enumerates the attached devices and fires events for any changes.
+
+            :param nocache: whether or not to bypass pyftdi's cached USB
+                            enumeration
+            :type nocache: bool
+            """
+            try:
+                found = USBDevice.find_all(nocache=nocache)
+
+            except CommError:
+                return
 
-                    for dev in current_devices.difference(last_devices):
-                        self.on_attached(device=dev)
+            # Nothing was plugged or unplugged; skip building the diff.
+            if found == self._last_found:
+                return
+            self._last_found = found
 
-                    for dev in last_devices.difference(current_devices):
-                        self.on_detached(device=dev)
+            # Devices are keyed by (vendor, product, serial number) so the
+            # diff only hashes their identity.  The identities from the last
+            # scan are kept as a frozenset rather than rebuilt every time.
+            last_devices, last_ids = self._devices, self._device_ids
+            current_devices = dict((dev[:3], dev) for dev in found)
+            current_ids = frozenset(current_devices)
 
-                    last_devices = current_devices
+            self._devices, self._device_ids = current_devices, current_ids
 
-                except CommError:
-                    pass
+            for dev_id in current_ids - last_ids:
+                self.on_attached(device=current_devices[dev_id])
 
-                time.sleep(0.25)
\ No newline at end of file
+            for dev_id in last_ids - current_ids:
+                self.on_detached(device=last_devices[dev_id])
@@ -8,6 +8,13 @@
 # Changes:
 #   * Added type check in fire()
 #   * Removed earg from fire() and added support for args/kwargs.
+#   * Store handlers in tuples so fire() iterates a snapshot.
+#   * Serialize handler updates so concurrent subscribers are not lost.
+
+import threading
+
+# Guards the read-modify-write of handler tuples in add/remove/clear.
+_update_lock = threading.RLock()
 
 
 class Event(object):
@@ -30,19 +37,30 @@ class EventHandler(object):
 
         self.event = event
         self.obj = obj
+        self._handlers = None
 
     def __iter__(self):
         return iter(self._getfunctionlist())
 
+    def _gethandlers(self):
+
+        """(internal use) """
+
+        handlers = self._handlers
+        if handlers is None:
+            with _update_lock:
+                try:
+                    handlers = self.obj.__eventhandler__
+                except AttributeError:
+                    handlers = self.obj.__eventhandler__ = {}
+            self._handlers = handlers
+        return handlers
+
     def _getfunctionlist(self):
 
         """(internal use) """
 
-        try:
-            eventhandler = self.obj.__eventhandler__
-        except AttributeError:
-            eventhandler = self.obj.__eventhandler__ = {}
-        return eventhandler.setdefault(self.event, [])
+        return self._gethandlers().get(self.event, ())
 
     def add(self, func):
 
@@ -52,7 +70,11 @@ class EventHandler(object):
         You can add handler also by using '+=' operator.
         """
 
-        self._getfunctionlist().append(func)
+        # Handlers are kept in a tuple that is replaced rather than
+        # mutated, so fire() always iterates a stable snapshot.
+        with _update_lock:
+            handlers = self._gethandlers()
+            handlers[self.event] = handlers.get(self.event, ()) + (func,)
         return self
 
     def remove(self, func):
@@ -62,11 +84,16 @@ class EventHandler(object):
         You can remove handler also by using '-=' operator.
         """
 
-        self._getfunctionlist().remove(func)
+        with _update_lock:
+            handlers = self._gethandlers()
+            functions = list(handlers.get(self.event, ()))
+            functions.remove(func)
+            handlers[self.event] = tuple(functions)
         return self
 
     def clear(self):
-        del self._getfunctionlist()[:]
+        with _update_lock:
+            self._gethandlers()[self.event] = ()
         return self
 
     def fire(self, *args, **kwargs):
@@ -77,11 +104,12 @@ class EventHandler(object):
         e.fire(*args, **kwargs).
         """
 
+        obj = self.obj
         for func in self._getfunctionlist():
             if type(func) == EventHandler:
                 func.fire(*args, **kwargs)
             else:
-                func(self.obj, *args, **kwargs)
+                func(obj, *args, **kwargs)
 
     __iadd__ = add
     __isub__ = remove
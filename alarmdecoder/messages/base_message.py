@@ -10,18 +10,37 @@ class BaseMessage(object):
     Base class for messages.
     """
 
-    raw = None
-    """The raw message text"""
-
-    timestamp = None
-    """The timestamp of the message"""
+    __slots__ = ('raw', 'timestamp')
 
     def __init__(self, data=None):
         """
         Constructor
         """
         self.timestamp = datetime.datetime.now()
+        """The timestamp of the message"""
         self.raw = data
+        """The raw message text"""
+
+    def __getstate__(self):
+        """
+        Pickle support.  Messages that declare __slots__ have no __dict__ to
+        pickle by default, so their slot values are collected here.
+        """
+        state = dict(getattr(self, '__dict__', {}))
+
+        for cls in type(self).__mro__:
+            for name in getattr(cls, '__slots__', ()):
+                if hasattr(self, name):
+                    state[name] = getattr(self, name)
+
+        return state
+
+    def __setstate__(self, state):
+        """
+        Restores a pickled message.
+        """
+        for name, value in state.items():
+            setattr(self, name, value)
 
     def __str__(self):
         """
@@ -18,59 +18,21 @@ from ..panels import PANEL_TYPES, ADEMCO, DSC
 class Message(BaseMessage):
     """
     Represents a message from the alarm panel.
+
+    Message declares __slots__ because one is created for every keypad
+    line.  Only the attributes below can be set on an instance; subclass
+    Message to attach extra data.
     """
 
-    ready = False
-    """Indicates whether or not the panel is in a ready state."""
-    armed_away = False
-    """Indicates whether or not the panel is armed away."""
-    armed_home = False
-    """Indicates whether or not the panel is armed home."""
-    backlight_on = False
-    """Indicates whether or not the keypad backlight is on."""
-    programming_mode = False
-    """Indicates whether or not we're in programming mode."""
-    beeps = -1
-    """Number of beeps associated with a message."""
-    zone_bypassed = False
-    """Indicates whether or not a zone is bypassed."""
-    ac_power = False
-    """Indicates whether or not the panel is on AC power."""
-    chime_on = False
-    """Indicates whether or not the chime is enabled."""
-    alarm_event_occurred = False
-    """Indicates whether or not an alarm event has occurred."""
-    alarm_sounding = False
-    """Indicates whether or not an alarm is sounding."""
-    battery_low = False
-    """Indicates whether or not there is a low battery."""
-    entry_delay_off = False
-    """Indicates whether or not the entry delay is enabled."""
-    fire_alarm = False
-    """Indicates whether or not a fire alarm is sounding."""
-    check_zone = False
-    """Indicates whether or not there are zones that require attention."""
-    perimeter_only = False
-    """Indicates whether or not the perimeter is armed."""
-    system_fault = -1
-    """Indicates if any panel specific system fault exists."""
-    panel_type = ADEMCO
-    """Indicates which panel type was the source of this message."""
-    numeric_code = None
-    """The numeric code associated with the message."""
-    text = None
-    """The human-readable text to be displayed on the panel LCD."""
-    cursor_location = -1
-    """Current cursor location on the keypad."""
-    mask = 0xFFFFFFFF
-    """Address mask this message is intended for."""
-    bitfield = None
-    """The bitfield associated with this message."""
-    panel_data = None
-    """The panel data field associated with this message."""
-
-
-    _regex = re.compile('^(!KPM:){0,1}(\[[a-fA-F0-9\-]+\]),([a-fA-F0-9]+),(\[[a-fA-F0-9]+\]),(".+")$')
+    __slots__ = ('ready', 'armed_away', 'armed_home', 'backlight_on',
+                 'programming_mode', 'beeps', 'zone_bypassed', 'ac_power',
+                 'chime_on', 'alarm_event_occurred', 'alarm_sounding',
+                 'battery_low', 'entry_delay_off', 'fire_alarm', 'check_zone',
+                 'perimeter_only', 'system_fault', 'panel_type',
+                 'numeric_code', 'text', 'cursor_location', 'mask',
+                 'bitfield', 'panel_data')
+
+    _regex = re.compile(r'^(!KPM:){0,1}(\[[a-fA-F0-9\-]+\]),([a-fA-F0-9]+),(\[[a-fA-F0-9]+\]),(".+")$')
 
     def __init__(self, data=None):
         """
@@ -81,6 +43,55 @@ class Message(BaseMessage):
         """
         BaseMessage.__init__(self, data)
 
+        self.ready = False
+        """Indicates whether or not the panel is in a ready state."""
+        self.armed_away = False
+        """Indicates whether or not the panel is armed away."""
+        self.armed_home = False
+        """Indicates whether or not the panel is armed home."""
+        self.backlight_on = False
+        """Indicates whether or not the keypad backlight is on."""
+        self.programming_mode = False
+        """Indicates whether or not we're in programming mode."""
+        self.beeps = -1
+        """Number of beeps associated with a message."""
+        self.zone_bypassed = False
+        """Indicates whether or not a zone is bypassed."""
+        self.ac_power = False
+        """Indicates whether or not the panel is on AC power."""
+        self.chime_on = False
+        """Indicates whether or not the chime is enabled."""
+        self.alarm_event_occurred = False
+        """Indicates whether or not an alarm event has occurred."""
+        self.alarm_sounding = False
+        """Indicates whether or not an alarm is sounding."""
+        self.battery_low = False
+        """Indicates whether or not there is a low battery."""
+        self.entry_delay_off = False
+        """Indicates whether or not the entry delay is enabled."""
+        self.fire_alarm = False
+        """Indicates whether or not a fire alarm is sounding."""
+        self.check_zone = False
+        """Indicates whether or not there are zones that require attention."""
+        self.perimeter_only = False
+        """Indicates whether or not the perimeter is armed."""
+        self.system_fault = -1
+        """Indicates if any panel specific system fault exists."""
+        self.panel_type = ADEMCO
+        """Indicates which panel type was the source of this message."""
+        self.numeric_code = None
+        """The numeric code associated with the message."""
+        self.text = None
+        """The human-readable text to be displayed on the panel LCD."""
+        self.cursor_location = -1
+        """Current cursor location on the keypad."""
+        self.mask = 0xFFFFFFFF
+        """Address mask this message is intended for."""
+        self.bitfield = None
+        """The bitfield associated with this message."""
+        self.panel_data = None
+        """The panel data field associated with this message."""
+
         if data is not None:
             self._parse_message(data)
 
@@ -100,27 +111,26 @@ class Message(BaseMessage):
 
         header, self.bitfield, self.numeric_code, self.panel_data, alpha = match.group(1, 2, 3, 4, 5)
 
-        is_bit_set = lambda bit: not self.bitfield[bit] == "0"
-
-        self.ready = is_bit_set(1)
-        self.armed_away = is_bit_set(2)
-        self.armed_home = is_bit_set(3)
-        self.backlight_on = is_bit_set(4)
-        self.programming_mode = is_bit_set(5)
-        self.beeps = int(self.bitfield[6], 16)
-        self.zone_bypassed = is_bit_set(7)
-        self.ac_power = is_bit_set(8)
-        self.chime_on = is_bit_set(9)
-        self.alarm_event_occurred = is_bit_set(10)
-        self.alarm_sounding = is_bit_set(11)
-        self.battery_low = is_bit_set(12)
-        self.entry_delay_off = is_bit_set(13)
-        self.fire_alarm = is_bit_set(14)
-        self.check_zone = is_bit_set(15)
-        self.perimeter_only = is_bit_set(16)
-        self.system_fault = int(self.bitfield[17], 16)
-        if self.bitfield[18] in list(PANEL_TYPES):
-            self.panel_type = PANEL_TYPES[self.bitfield[18]]
+        bitfield = self.bitfield
+
+        self.ready = bitfield[1] != "0"
+        self.armed_away = bitfield[2] != "0"
+        self.armed_home = bitfield[3] != "0"
+        self.backlight_on = bitfield[4] != "0"
+        self.programming_mode = bitfield[5] != "0"
+        self.beeps = int(bitfield[6], 16)
+        self.zone_bypassed = bitfield[7] != "0"
+        self.ac_power = bitfield[8] != "0"
+        self.chime_on = bitfield[9] != "0"
+        self.alarm_event_occurred = bitfield[10] != "0"
+        self.alarm_sounding = bitfield[11] != "0"
+        self.battery_low = bitfield[12] != "0"
+        self.entry_delay_off = bitfield[13] != "0"
+        self.fire_alarm = bitfield[14] != "0"
+        self.check_zone = bitfield[15] != "0"
+        self.perimeter_only = bitfield[16] != "0"
+        self.system_fault = int(bitfield[17], 16)
+        self.panel_type = PANEL_TYPES.get(bitfield[18], self.panel_type)
         # pos 20-21 - Unused.
         self.text = alpha.strip('"')
         self.mask = int(self.panel_data[3:3+8], 16)
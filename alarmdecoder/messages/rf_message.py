@@ -25,7 +25,7 @@ class RFMessage(BaseMessage):
     """Low battery indication"""
     supervision = False
     """Supervision required indication"""
-    loop = [False for _ in list(range(4))]
+    loop = [False] * 4
     """Loop indicators"""
 
     def __init__(self, data=None):
@@ -52,18 +52,16 @@ class RFMessage(BaseMessage):
         try:
             _, values = data.split(':')
             self.serial_number, self.value = values.split(',')
-            self.value = int(self.value, 16)
-
-            is_bit_set = lambda b: self.value & (1 << (b - 1)) > 0
+            self.value = value = int(self.value, 16)
 
             # Bit 1 = unknown
-            self.battery = is_bit_set(2)
-            self.supervision = is_bit_set(3)
+            self.battery = value & 0x02 > 0
+            self.supervision = value & 0x04 > 0
             # Bit 4 = unknown
-            self.loop[2] = is_bit_set(5)
-            self.loop[1] = is_bit_set(6)
-            self.loop[3] = is_bit_set(7)
-            self.loop[0] = is_bit_set(8)
+            self.loop[2] = value & 0x10 > 0
+            self.loop[1] = value & 0x20 > 0
+            self.loop[3] = value & 0x40 > 0
+            self.loop[0] = value & 0x80 > 0
 
         except ValueError:
             raise InvalidMessageError('Received invalid message: {0}'.format(data))
@@ -15,6 +15,13 @@ import alarmdecoder
 from io import open
 from collections import deque
 
+try:
+    from time import monotonic
+
+except ImportError:
+    # Python 2.7 has no monotonic clock in the standard library.
+    from time import time as monotonic
+
 
 class NoDeviceError(Exception):
     """
@@ -109,6 +116,16 @@ def filter_ad2prot_byte(buf):
     else:
         return b''
 
+_AD2PROT_INVALID_BYTES = bytes(bytearray(c for c in range(256) if c not in (10, 13) and not 31 < c < 127))
+
+
+def filter_ad2prot_bytes(buf):
+    """
+    Return the bytes sent in with everything but visible terminal characters
+    and line terminators removed.
+    """
+    return bytes(buf).translate(None, _AD2PROT_INVALID_BYTES)
+
 def read_firmware_file(file_path):
     """
     Reads a firmware file into a dequeue for processing.
@@ -205,7 +222,7 @@ class Firmware(object):
             # Close the reader thread and wait for it to die, otherwise
             # it interferes with our reading.
             device.stop_reader()
-            while device._read_thread.is_alive():
+            while device.is_reader_alive():
                 stage = progress_stage(Firmware.STAGE_WAITING)
                 time.sleep(0.5)
 
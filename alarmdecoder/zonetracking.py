@@ -82,6 +82,8 @@ class Zonetracker(object):
     EXPIRE = 30
     """Zone expiration timeout."""
 
+    _check_zone_regex = re.compile(r'^CHECK (\d+).*$')
+
     @property
     def zones(self):
         """
@@ -183,9 +185,7 @@ class Zonetracker(object):
                 #       3-digit mode is enabled... so we have to pull it out
                 #       of the alpha message.
                 if zone == 191:
-                    zone_regex = re.compile('^CHECK (\d+).*$')
-
-                    match = zone_regex.match(message.text)
+                    match = self._check_zone_regex.match(message.text)
                     if match is None:
                         return
 
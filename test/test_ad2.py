@@ -148,6 +148,11 @@ class TestAlarmDecoder(TestCase):
         self._decoder.close()
         self._device.close.assert_called()
 
+    def test_fileno(self):
+        self._device.fileno.return_value = 5
+
+        self.assertEquals(self._decoder.fileno(), 5)
+
     def test_send(self):
         self._decoder.send('test')
         self._device.write.assert_called_with(b'test')
@@ -160,6 +165,14 @@ class TestAlarmDecoder(TestCase):
         self._decoder.save_config()
         self._device.write.assert_called()
 
+    def test_get_config_string(self):
+        self._decoder.emulate_zone = [True, False, True, False, False]
+        self._decoder.emulate_relay = [False, False, False, True]
+
+        config_string = self._decoder.get_config_string()
+        self.assertIn('EXP=YNYNN', config_string)
+        self.assertIn('REL=NNNY', config_string)
+
     def test_reboot(self):
         self._decoder.reboot()
         self._device.write.assert_called_with(b'=')
@@ -183,6 +196,17 @@ class TestAlarmDecoder(TestCase):
         self._decoder._on_read(self, data=b'[00000000000000000A--],000,[f707000600e5800c0c020000],"                                "')
         self.assertTrue(self._message_received)
 
+    def test_message_masked(self):
+        self._decoder.internal_address_mask = int('00000001', 16)
+
+        msg = self._decoder._handle_message(b'[00000000000000000A--],000,[f707000600e5800c0c020000],"                                "')
+        self.assertIsNone(msg)
+        self.assertFalse(self._message_received)
+
+        msg = self._decoder._handle_message(b'[00000000000000000A--],000,[f700000001e5800c0c020000],"                                "')
+        self.assertIsInstance(msg, Message)
+        self.assertTrue(self._message_received)
+
     def test_message_kpm(self):
         msg = self._decoder._handle_message(b'!KPM:[00000000000000000A--],000,[f707000600e5800c0c020000],"                                "')
         self.assertIsInstance(msg, Message)
@@ -240,6 +264,29 @@ class TestAlarmDecoder(TestCase):
         self.assertFalse(self._decoder.deduplicate)
         self.assertTrue(self._got_config)
 
+    def test_config_message_enabled(self):
+        emulate_zone = self._decoder.emulate_zone
+        emulate_relay = self._decoder.emulate_relay
+
+        msg = self._decoder._handle_message(b'!CONFIG>MODE=D&CONFIGBITS=ff00&ADDRESS=21&LRR=Y&COM=Y&EXP=YNNNY&REL=NYNN&MASK=00000001&DEDUPLICATE=Y')
+        self.assertEquals(self._decoder.mode, DSC)
+        self.assertEquals(self._decoder.address, 21)
+        self.assertEquals(self._decoder.address_mask, 1)
+        self.assertEquals(self._decoder.emulate_zone, [True, False, False, False, True])
+        self.assertIs(self._decoder.emulate_zone, emulate_zone)
+        self.assertIs(self._decoder.emulate_relay, emulate_relay)
+        self.assertEquals(self._decoder.emulate_relay, [False, True, False, False])
+        self.assertTrue(self._decoder.emulate_lrr)
+        self.assertTrue(self._decoder.emulate_com)
+        self.assertTrue(self._decoder.deduplicate)
+
+    def test_config_message_short_flags(self):
+        emulate_zone = self._decoder.emulate_zone
+
+        self._decoder._handle_message(b'!CONFIG>EXP=YN')
+        self.assertIs(self._decoder.emulate_zone, emulate_zone)
+        self.assertEquals(self._decoder.emulate_zone, [True, False, False, False, False])
+
     def test_power_changed_event(self):
         msg = self._decoder._handle_message(b'[00000001000000000A--],000,[f707000600e5800c0c020000],"                                "')
         self.assertFalse(self._power_changed)   # Not set first time we hit it.
@@ -352,6 +399,11 @@ class TestAlarmDecoder(TestCase):
         self._decoder._on_read(self, data=b'!Ready')
         self.assertTrue(self._on_boot_received)
 
+    def test_unknown_status_ignored(self):
+        self.assertIsNone(self._decoder._handle_message(b'!>'))
+        self.assertIsNone(self._decoder._handle_message(b'!Unknown command'))
+        self.assertFalse(self._on_boot_received)
+
     def test_zone_fault_and_restore(self):
         self._decoder._on_read(self, data=b'[00010001000000000A--],003,[f70000051003000008020000000000],"FAULT 03                        "')
         self.assertEquals(self._zone_faulted, 3)
@@ -6,8 +6,10 @@ import socket
 import time
 import tempfile
 import os
+import errno
 import select
-from alarmdecoder.devices import USBDevice, SerialDevice, SocketDevice
+import threading
+from alarmdecoder.devices import Device, USBDevice, SerialDevice, SocketDevice
 from alarmdecoder.util import NoDeviceError, CommError, TimeoutError
 
 # Optional FTDI tests
@@ -39,6 +41,15 @@ class TestSerialDevice(TestCase):
         self._device.close()
 
     ### Tests
+    def test_find_all(self):
+        ports = [('/dev/ttyUSB0', 'FT232R USB UART', 'USB VID:PID=0403:6001'), ('/dev/ttyS0', 'ttyS0', 'n/a')]
+
+        with patch('serial.tools.list_ports.comports', return_value=ports) as mock:
+            self.assertEquals(SerialDevice.find_all(nocache=True), ports)
+            self.assertEquals(SerialDevice.find_all('0403:6001'), ports[:1])
+
+            mock.assert_called_once_with()
+
     def test_open(self):
         self._device.interface = '/dev/ttyS0'
 
@@ -63,6 +74,28 @@ class TestSerialDevice(TestCase):
             with self.assertRaises(NoDeviceError):
                 self._device.open(no_reader_thread=True)
 
+    def test_open_no_reader_thread(self):
+        self._device.interface = '/dev/ttyS0'
+        self._device.open(no_reader_thread=True)
+
+        self.assertIsNone(self._device._read_thread)
+        self.assertFalse(self._device.is_reader_alive())
+
+        with patch.object(self._device._device, 'close') as mock:
+            self._device.close()
+
+            mock.assert_called_with()
+
+    def test_stop_reader_timeout(self):
+        self._device._read_thread = Mock(spec=Device.ReadThread)
+        self._device._read_thread.is_alive.return_value = True
+
+        self._device.stop_reader(timeout=2.5)
+
+        self._device._read_thread.stop.assert_called_with()
+        self._device._read_thread.join.assert_called_with(2.5)
+        self.assertTrue(Device.ReadThread(self._device).daemon)
+
     def test_write(self):
         self._device.interface = '/dev/ttyS0'
         self._device.open(no_reader_thread=True)
@@ -72,6 +105,55 @@ class TestSerialDevice(TestCase):
 
             mock.assert_called_with(b'test')
 
+    def test_write_buffered(self):
+        self._device.buffered_writes = True
+
+        with patch.object(self._device._device, 'write') as mock:
+            self._device.write(b'12')
+            self._device.write(b'34')
+            mock.assert_not_called()
+
+            self._device.write(b'*\r')
+            mock.assert_called_once_with(b'1234*\r')
+
+            self._device.write(b'5')
+            self._device.flush()
+            mock.assert_called_with(b'5')
+
+    def test_write_buffered_flush_failure(self):
+        self._device.buffered_writes = True
+        self._device.write(b'12')
+
+        written = []
+        self._device.on_write += lambda sender, data: written.append(data)
+
+        with patch.object(self._device._device, 'write', side_effect=[SerialException, None]) as mock:
+            with self.assertRaises(CommError):
+                self._device.flush()
+
+            self.assertEqual(self._device._write_buffer, b'12')
+            self.assertEqual(written, [])
+
+            self._device.flush()
+            mock.assert_called_with(b'12')
+
+        self.assertEqual(self._device._write_buffer, b'')
+        self.assertEqual(written, [b'12'])
+
+    def test_write_buffered_discarded_on_close(self):
+        self._device.interface = '/dev/ttyS0'
+        self._device.open(no_reader_thread=True)
+        self._device.buffered_writes = True
+
+        with patch.object(self._device._device, 'write') as mock:
+            self._device.write(b'12')
+            self._device.close()
+
+            self._device.open(no_reader_thread=True)
+            self._device.write(b'34\r')
+
+            mock.assert_called_once_with(b'34\r')
+
     def test_write_exception(self):
         with patch.object(self._device._device, 'write', side_effect=SerialException):
             with self.assertRaises(CommError):
@@ -114,6 +196,17 @@ class TestSerialDevice(TestCase):
 
                     self.assertEquals(ret, "testing")
 
+    def test_read_line_buffered(self):
+        self._device._buffer.extend(b"\r\nfirst\r\nsec")
+
+        with patch.object(self._device._device, 'read', side_effect=[b'o', b'n', b'd', b'\r', b'\n']):
+            with patch('serial.Serial.fileno', return_value=1):
+                with patch.object(select, 'select', return_value=[[1], [], []]):
+                    self.assertEquals(self._device.read_line(), "first")
+                    self.assertEquals(self._device.read_line(), "second")
+
+        self.assertEquals(len(self._device._buffer), 0)
+
     def test_read_line_timeout(self):
         with patch.object(self._device._device, 'read', return_value=b'a') as mock:
             with patch('serial.Serial.fileno', return_value=1):
@@ -150,6 +243,50 @@ class TestSocketDevice(TestCase):
 
         mock.assert_called_with(self._device.interface)
 
+    def _start_idle_reader(self):
+        self._device._device, self._peer = socket.socketpair()
+        self._device._running = True
+        self._device._read_thread = Device.ReadThread(self._device)
+        self._device._read_thread.start()
+
+    def test_stop_reader_prompt(self):
+        self._start_idle_reader()
+
+        try:
+            start = time.time()
+            self._device.stop_reader(timeout=5.0)
+
+            self.assertFalse(self._device.is_reader_alive())
+            self.assertLess(time.time() - start, 2.0)
+
+        finally:
+            self._device._device.close()
+            self._peer.close()
+
+    def test_close_does_not_wait_for_reader(self):
+        self._start_idle_reader()
+        reader = self._device._read_thread
+
+        try:
+            start = time.time()
+            self._device.close()
+            self.assertLess(time.time() - start, 0.5)
+
+            reader.join(5.0)
+            self.assertFalse(reader.is_alive())
+
+        finally:
+            self._peer.close()
+
+    def test_open_socket_options(self):
+        with patch.object(socket.socket, '__init__', return_value=None):
+            with patch.object(socket.socket, 'connect', return_value=None):
+                with patch.object(socket.socket, 'setsockopt') as mock:
+                    self._device.open(no_reader_thread=True)
+
+        mock.assert_any_call(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        mock.assert_any_call(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+
     def test_open_failed(self):
         with patch.object(socket.socket, 'connect', side_effect=socket.error):
             with self.assertRaises(NoDeviceError):
@@ -186,6 +323,10 @@ class TestSocketDevice(TestCase):
 
             mock.assert_called_with(1)
 
+    def test_read_no_data(self):
+        with patch.object(select, 'select', return_value=[[], [], []]):
+            self.assertEqual(self._device.read(), '')
+
     def test_read_exception(self):
         with patch('socket.socket.fileno', return_value=1):
             with patch.object(select, 'select', return_value=[[1], [], []]):
@@ -209,6 +350,26 @@ class TestSocketDevice(TestCase):
 
             self.assertEquals(ret, "testing")
 
+    def test_read_line_chunked(self):
+        with patch('socket.socket.fileno', return_value=1):
+            with patch.object(select, 'select', return_value=[[1], [], []]):
+                with patch.object(self._device._device, 'recv', side_effect=[b"first\r\nsec\xff", b"ond\r\n"]) as mock:
+                    self.assertEquals(self._device.read_line(), "first")
+                    self.assertEquals(self._device.read_line(), "second")
+
+            mock.assert_called_with(self._device.READ_CHUNK_SIZE)
+
+    def test_read_line_ssl_pending(self):
+        self._device._use_ssl = True
+        self._device._device = Mock()
+        self._device._device.pending.return_value = 6
+        self._device._device.recv.return_value = b"test\r\n"
+
+        with patch.object(select, 'select') as mock:
+            self.assertEquals(self._device.read_line(), "test")
+
+        mock.assert_not_called()
+
     def test_read_line_timeout(self):
         with patch('socket.socket.fileno', return_value=1):
             with patch.object(select, 'select', return_value=[[1], [], []]):
@@ -264,6 +425,24 @@ class TestSocketDevice(TestCase):
         mock.assert_called_with(self._device.interface)
         self.assertIsInstance(self._device._device, SSL.Connection)
 
+    def test_ssl_context_reused(self):
+        if not have_openssl:
+            return
+
+        self._device.ssl = True
+
+        with patch.object(self._device, '_create_ssl_context', return_value=Mock()) as mock:
+            with patch.object(SSL, 'Connection'):
+                self._device._init_ssl()
+                self._device._init_ssl()
+
+                self.assertEquals(mock.call_count, 1)
+
+                self._device.ssl_allow_self_signed = True
+                self._device._init_ssl()
+
+                self.assertEquals(mock.call_count, 2)
+
     def test_ssl_exception(self):
         if not have_openssl:
             return
@@ -444,3 +623,167 @@ if have_pyftdi:
 
                 with self.assertRaises(CommError):
                     self._device.read_line()
+
+
+class TestUSBDetectThread(TestCase):
+    def setUp(self):
+        self._thread = USBDevice.DetectThread()
+        self._attached = []
+        self._detached = []
+
+        self._thread.on_attached += lambda sender, device: self._attached.append(device)
+        self._thread.on_detached += lambda sender, device: self._detached.append(device)
+
+    def _uevent(self, action=b'add', devtype=b'usb_device', product=b'403/6001/600'):
+        fields = [action + b'@/devices/pci0000:00/usb1/1-1',
+                  b'ACTION=' + action,
+                  b'DEVPATH=/devices/pci0000:00/usb1/1-1',
+                  b'SUBSYSTEM=usb',
+                  b'DEVTYPE=' + devtype]
+        if product is not None:
+            fields.append(b'PRODUCT=' + product)
+
+        return b'\0'.join(fields) + b'\0'
+
+    def test_is_device_uevent(self):
+        self.assertTrue(self._thread._is_device_uevent(self._uevent()))
+        self.assertTrue(self._thread._is_device_uevent(self._uevent(action=b'remove', product=b'403/6015/1000')))
+        self.assertTrue(self._thread._is_device_uevent(self._uevent(product=None)))
+
+        self.assertFalse(self._thread._is_device_uevent(self._uevent(action=b'bind')))
+        self.assertFalse(self._thread._is_device_uevent(self._uevent(devtype=b'usb_interface')))
+        self.assertFalse(self._thread._is_device_uevent(self._uevent(product=b'46d/c52b/1211')))
+        self.assertFalse(self._thread._is_device_uevent(b'libudev\0garbage'))
+
+    def test_scan_devices(self):
+        dev_a = (0x0403, 0x6001, 'A', 1, 'AD2USB')
+        dev_b = (0x0403, 0x6001, 'B', 1, 'AD2USB')
+        dev_c = (0x0403, 0x6015, 'C', 1, 'AD2USB')
+
+        with patch.object(USBDevice, 'find_all', side_effect=[[dev_a, dev_b], [dev_b, dev_a], [dev_b, dev_c], CommError, []]):
+            self._thread._scan_devices(True)
+            self.assertEqual(sorted(self._attached), [dev_a, dev_b])
+            self.assertEqual(self._detached, [])
+
+            # Reordering the same devices is not a change.
+            del self._attached[:]
+            self._thread._scan_devices(True)
+            self.assertEqual(self._attached, [])
+            self.assertEqual(self._detached, [])
+
+            # One device removed and another added in the same scan.
+            self._thread._scan_devices(True)
+            self.assertEqual(self._attached, [dev_c])
+            self.assertEqual(self._detached, [dev_a])
+
+            # A failed enumeration leaves the known devices alone.
+            del self._attached[:]
+            del self._detached[:]
+            self._thread._scan_devices(True)
+            self.assertEqual(self._attached, [])
+            self.assertEqual(self._detached, [])
+
+            self._thread._scan_devices(True)
+            self.assertEqual(sorted(self._detached), [dev_b, dev_c])
+
+    def _run_uevent_loop(self, scan_limit, events=(), send=None):
+        uevent_sock, peer = socket.socketpair(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self._thread._wake_pipe = os.pipe()
+        self._thread._running = True
+
+        for event in events:
+            peer.send(event)
+
+        scans = []
+
+        def scan(nocache):
+            scans.append(time.time())
+            if len(scans) >= scan_limit:
+                self._thread.stop()
+
+        # Keeps a regression from hanging the test run.
+        watchdog = threading.Timer(5.0, self._thread.stop)
+        watchdog.start()
+
+        try:
+            with patch.object(self._thread, '_scan_devices', side_effect=scan):
+                if send is not None:
+                    send(peer)
+
+                self._thread._wait_for_uevents(uevent_sock)
+
+        finally:
+            watchdog.cancel()
+            uevent_sock.close()
+            peer.close()
+            for fd in self._thread._wake_pipe:
+                os.close(fd)
+            self._thread._wake_pipe = None
+
+        return scans
+
+    def test_stop_before_run(self):
+        uevent_sock, peer = socket.socketpair(socket.AF_UNIX, socket.SOCK_DGRAM)
+
+        try:
+            with patch.object(self._thread, '_open_uevent_socket', return_value=uevent_sock):
+                with patch.object(self._thread, '_scan_devices') as scan:
+                    self._thread.stop()
+                    self._thread.start()
+                    self._thread.join(5.0)
+
+            self.assertFalse(self._thread.is_alive())
+            self.assertFalse(self._thread._running)
+            scan.assert_not_called()
+
+        finally:
+            peer.close()
+
+    def test_select_failure_falls_back_to_polling(self):
+        uevent_sock, peer = socket.socketpair(socket.AF_UNIX, socket.SOCK_DGRAM)
+
+        try:
+            with patch.object(self._thread, '_open_uevent_socket', return_value=uevent_sock):
+                with patch.object(self._thread, '_scan_devices'):
+                    with patch.object(select, 'select', side_effect=OSError(errno.EBADF, 'Bad file descriptor')):
+                        with patch.object(self._thread, '_poll_devices') as poll:
+                            self._thread.run()
+
+            poll.assert_called_with()
+            self.assertIsNone(self._thread._wake_pipe)
+
+        finally:
+            peer.close()
+
+    def test_wait_for_uevents_debounce(self):
+        # The initial scan, then a single scan for the whole burst.
+        burst = [self._uevent(), self._uevent(devtype=b'usb_interface'), self._uevent()]
+        scans = self._run_uevent_loop(2, events=burst)
+
+        self.assertEqual(len(scans), 2)
+        self.assertGreaterEqual(scans[1] - scans[0], self._thread.UEVENT_SETTLE_TIME * 0.5)
+
+    def test_wait_for_uevents_safety_scan(self):
+        self._thread.UEVENT_RESCAN_INTERVAL = 0.2
+        stop_sending = threading.Event()
+
+        def send(peer):
+            def flood():
+                while not stop_sending.wait(0.02):
+                    try:
+                        peer.send(self._uevent(action=b'bind'))
+                    except socket.error:
+                        break
+
+            threading.Thread(target=flood).start()
+
+        # Unrelated events arriving faster than the rescan interval must not
+        # postpone the safety scan.
+        try:
+            start = time.time()
+            scans = self._run_uevent_loop(3, send=send)
+        finally:
+            stop_sending.set()
+
+        self.assertEqual(len(scans), 3)
+        self.assertLess(time.time() - start, 2.0)
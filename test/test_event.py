@@ -0,0 +1,121 @@
+import threading
+from unittest import TestCase
+
+from alarmdecoder.event.event import Event, EventHandler
+
+
+class Source(object):
+    on_test = Event("Test event.")
+    on_other = Event("Another test event.")
+
+
+class TestEvent(TestCase):
+    def setUp(self):
+        self._source = Source()
+        self._calls = []
+
+    def tearDown(self):
+        pass
+
+    ### Tests
+    def test_fire(self):
+        self._source.on_test += lambda sender, value: self._calls.append(('a', sender, value))
+        self._source.on_test(value=1)
+
+        self.assertEqual(self._calls, [('a', self._source, 1)])
+
+    def test_remove_self_during_fire(self):
+        def once(sender):
+            self._calls.append('once')
+            self._source.on_test -= once
+
+        def always(sender):
+            self._calls.append('always')
+
+        self._source.on_test += once
+        self._source.on_test += always
+
+        # The handler list is snapshotted, so removing a handler does not
+        # skip the one after it.
+        self._source.on_test()
+        self.assertEqual(self._calls, ['once', 'always'])
+
+        self._source.on_test()
+        self.assertEqual(self._calls, ['once', 'always', 'always'])
+
+    def test_add_during_fire(self):
+        def late(sender):
+            self._calls.append('late')
+
+        def adder(sender):
+            self._calls.append('adder')
+            self._source.on_test -= adder
+            self._source.on_test += late
+
+        self._source.on_test += adder
+
+        # A handler added while firing only sees the next fire.
+        self._source.on_test()
+        self.assertEqual(self._calls, ['adder'])
+
+        self._source.on_test()
+        self.assertEqual(self._calls, ['adder', 'late'])
+
+    def test_clear_during_fire(self):
+        def clearer(sender):
+            self._calls.append('clearer')
+            self._source.on_test.clear()
+
+        self._source.on_test += clearer
+        self._source.on_test += lambda sender: self._calls.append('after')
+
+        self._source.on_test()
+        self.assertEqual(self._calls, ['clearer', 'after'])
+
+        self._source.on_test()
+        self.assertEqual(self._calls, ['clearer', 'after'])
+        self.assertEqual(list(self._source.on_test), [])
+
+    def test_cached_handlers(self):
+        fire = self._source.on_test.fire
+
+        # Handlers added through a fresh descriptor lookup are seen by an
+        # EventHandler that was bound earlier.
+        self._source.on_test += lambda sender: self._calls.append('a')
+        fire()
+        self.assertEqual(self._calls, ['a'])
+
+        handler = self._source.on_test
+        self.assertIsInstance(handler, EventHandler)
+        self.assertIs(handler._gethandlers(), self._source.__eventhandler__)
+
+        # Events on the same object share the dictionary but not handlers.
+        self._source.on_other += lambda sender: self._calls.append('other')
+        fire()
+        self.assertEqual(self._calls, ['a', 'a'])
+        self.assertEqual(len(self._source.__eventhandler__), 2)
+
+    def test_events_per_instance(self):
+        other = Source()
+        self._source.on_test += lambda sender: self._calls.append('a')
+
+        other.on_test()
+        self.assertEqual(self._calls, [])
+
+    def test_concurrent_add(self):
+        barrier = threading.Event()
+
+        def subscribe():
+            barrier.wait()
+            for _ in range(200):
+                self._source.on_test += lambda sender: None
+
+        threads = [threading.Thread(target=subscribe) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+
+        barrier.set()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(list(self._source.on_test)), 8 * 200)
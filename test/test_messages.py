@@ -1,3 +1,5 @@
+import copy
+import pickle
 from unittest import TestCase
 
 from alarmdecoder.messages import Message, ExpanderMessage, RFMessage, LRRMessage
@@ -90,3 +92,26 @@ class TestMessages(TestCase):
     def test_lrr_message_parse_fail(self):
         with self.assertRaises(InvalidMessageError):
             msg = LRRMessage('')
+
+    def test_message_slots(self):
+        msg = Message('[00000000000000000A--],001,[f707000600e5800c0c020000],"FAULT 1                         "')
+
+        self.assertFalse(hasattr(msg, '__dict__'))
+
+        with self.assertRaises(AttributeError):
+            msg.extra = True
+
+    def test_message_pickle_and_copy(self):
+        msg = Message('[00000000000000000A--],001,[f707000600e5800c0c020000],"FAULT 1                         "')
+
+        copies = [copy.copy(msg), copy.deepcopy(msg)]
+        for protocol in range(pickle.HIGHEST_PROTOCOL + 1):
+            copies.append(pickle.loads(pickle.dumps(msg, protocol)))
+
+        for other in copies:
+            self.assertEqual(other.dict(), msg.dict())
+            self.assertEqual(other.raw, msg.raw)
+
+        expander = ExpanderMessage('!EXP:07,01,01')
+        other = pickle.loads(pickle.dumps(expander, 0))
+        self.assertEqual(other.dict(), expander.dict())